@@ -3,6 +3,9 @@ Configuration module for Akasa Air ETL Pipeline
 Handles environment variables and database connection setup
 """
 import os
+import atexit
+import threading
+from functools import lru_cache
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 
@@ -15,6 +18,8 @@ class Config:
         self.mysql_password = os.getenv("MYSQL_PASSWORD")
         self.mysql_db = os.getenv("MYSQL_DB")
         self.mysql_host = os.getenv("MYSQL_HOST")
+        self._engine = None
+        self._engine_lock = threading.Lock()
         
         # Validate required environment variables
         self._validate_config()
@@ -29,9 +34,34 @@ class Config:
             raise ValueError("Missing required environment variables. Check your .env file.")
     
     def get_database_engine(self):
-        """Create and return SQLAlchemy database engine"""
-        connection_string = (
-            f"mysql+mysqlconnector://{self.mysql_user}:{self.mysql_password}"
-            f"@{self.mysql_host}/{self.mysql_db}"
-        )
-        return create_engine(connection_string)
\ No newline at end of file
+        """
+        Create (once) and return SQLAlchemy database engine
+        
+        The engine and its connection pool are shared by every caller for the life
+        of the process and disposed at interpreter exit.
+        """
+        if self._engine is None:
+            with self._engine_lock:
+                if self._engine is None:
+                    connection_string = (
+                        f"mysql+mysqlconnector://{self.mysql_user}:{self.mysql_password}"
+                        f"@{self.mysql_host}/{self.mysql_db}"
+                    )
+                    engine = create_engine(
+                        connection_string,
+                        # Lets DatabaseLoader bulk load with LOAD DATA LOCAL INFILE
+                        connect_args={"allow_local_infile": True},
+                        pool_size=10,
+                        max_overflow=20,
+                        pool_pre_ping=True,
+                        pool_recycle=1800
+                    )
+                    atexit.register(engine.dispose)
+                    self._engine = engine
+        return self._engine
+
+
+@lru_cache(maxsize=1)
+def get_config():
+    """Return the process-wide Config, loading the .env file only on first use"""
+    return Config()
@@ -2,17 +2,106 @@
 Streamlit Dashboard for Akasa Air ETL Pipeline
 Displays KPIs and analytics from processed data
 """
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from config import Config
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from config import get_config
+from database_loader import ORDER_VALUE_EDGES
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def run_cached_query(query, params=()):
+    """Execute SQL query on a pooled connection and return DataFrame (cached for 5 minutes)"""
+    engine = get_config().get_database_engine()
+    with engine.connect() as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_regions():
+    """Return the distinct customer regions for the filter (cached for an hour)"""
+    engine = get_config().get_database_engine()
+    with engine.connect() as conn:
+        return pd.read_sql_query("SELECT DISTINCT region FROM customers", conn)['region'].tolist()
+
+
+# Labels of orders.amount_bucket values: bucket i covers [edge i-1, edge i) of ORDER_VALUE_EDGES
+BUCKET_LABELS = ['Under ₹1,000', '₹1,000 - ₹5,000', '₹5,000 - ₹10,000', 'Above ₹10,000']
+
+
+@lru_cache(maxsize=4)
+def build_queries(region_clause=""):
+    """Build all dashboard queries for a region clause (memoized per clause)"""
+    return {
+        "Repeat Customers":
+            f"""SELECT c.customerid, c.customername, COUNT(DISTINCT o.orderid) AS num_orders
+            FROM customers c JOIN orders o ON c.customerid = o.customerid
+            WHERE TRUE {region_clause}
+            GROUP BY c.customerid, c.customername
+            HAVING COUNT(DISTINCT o.orderid) > 1""",
+
+        "Orders Month-by-Month":
+            f"""SELECT 
+                DATE_FORMAT(orderdatetime, '%%Y-%%m') AS month,
+                COUNT(DISTINCT o.orderid) AS total_orders,
+                SUM(o.totalamount) AS total_revenue,
+                AVG(o.totalamount) AS avg_order_value,
+                SUM(o.skucount) AS total_items
+            FROM orders o
+            WHERE TRUE {region_clause}
+            GROUP BY month ORDER BY month""",
+
+        "Revenue by Region":
+            f"""SELECT o.region, 
+                SUM(o.totalamount) AS total_revenue,
+                COUNT(DISTINCT o.orderid) AS total_orders,
+                COUNT(DISTINCT o.customerid) AS unique_customers
+            FROM orders o
+            WHERE TRUE {region_clause}
+            GROUP BY o.region ORDER BY total_revenue DESC""",
+
+        "Top Revenue Region":
+            """SELECT o.region, SUM(o.totalamount) AS total_revenue 
+            FROM orders o 
+            GROUP BY o.region ORDER BY total_revenue DESC LIMIT 1""",
+
+        "Top Spender (Last 30 Days)":
+            f"""SELECT c.customerid, c.customername, SUM(o.totalamount) AS amount_spent
+            FROM customers c JOIN orders o ON c.customerid = o.customerid
+            WHERE o.orderdatetime >= DATE_SUB(NOW(), INTERVAL 30 DAY) {region_clause}
+            GROUP BY c.customerid, c.customername
+            ORDER BY amount_spent DESC LIMIT 1""",
+
+        "Order Value Distribution":
+            f"""SELECT o.amount_bucket AS bucket,
+                COUNT(DISTINCT o.orderid) AS order_count,
+                SUM(o.totalamount) AS total_revenue
+            FROM orders o
+            WHERE TRUE {region_clause}
+            GROUP BY o.amount_bucket ORDER BY o.amount_bucket"""
+    }
+
+
+def bucket_order_values(distribution_df):
+    """Label the per-bucket totals of the distribution query with BUCKET_LABELS ranges"""
+    # Orders without an amount fall in no bucket
+    distribution = distribution_df.dropna(subset=['bucket'])
+    return pd.DataFrame({
+        'order_range': [BUCKET_LABELS[int(bucket)] for bucket in distribution['bucket']],
+        'order_count': distribution['order_count'].astype(int).to_numpy(),
+        'total_revenue': distribution['total_revenue'].astype(float).to_numpy()
+    })
+
 
 class DashboardApp:
     """Streamlit dashboard application for displaying ETL results"""
     
     def __init__(self):
         """Initialize dashboard with database configuration"""
-        self.config = Config()
+        self.config = get_config()
         self.setup_page_config()
         self.setup_custom_css()
     
@@ -60,87 +149,36 @@ class DashboardApp:
             </style>
         """, unsafe_allow_html=True)
     
-    def get_database_connection(self):
-        """Get database connection using mysql-connector-python"""
-        import mysql.connector
-        try:
-            conn = mysql.connector.connect(
-                host=self.config.mysql_host,
-                user=self.config.mysql_user,
-                password=self.config.mysql_password,
-                database=self.config.mysql_db
-            )
-            return conn
-        except Exception as e:
-            st.error(f"Error connecting to Database: {e}")
-            st.stop()
+    def run_query(self, query, params=None):
+        """Execute SQL query and return DataFrame, served from cache on repeat reruns"""
+        return run_cached_query(query, tuple(params or ()))
     
-    def run_query(self, query, params=None, conn=None):
-        """Execute SQL query and return DataFrame"""
-        cursor = conn.cursor()
-        cursor.execute(query, params or ())
-        cols = [desc[0] for desc in cursor.description]
-        df = pd.DataFrame(cursor.fetchall(), columns=cols)
-        cursor.close()
-        return df
+    def run_queries(self, queries):
+        """
+        Execute several queries concurrently so their database round-trips overlap
+        
+        Args:
+            queries (dict): Mapping of name -> (query, params)
+            
+        Returns:
+            dict: Mapping of name -> result DataFrame
+        """
+        # Worker threads need the script context to use Streamlit's cache
+        ctx = get_script_run_ctx()
+        with ThreadPoolExecutor(
+            max_workers=len(queries),
+            initializer=add_script_run_ctx,
+            initargs=(None, ctx)
+        ) as executor:
+            futures = {
+                name: executor.submit(self.run_query, query, params)
+                for name, (query, params) in queries.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
     
-    def get_queries(self, region_clause="", params=None):
+    def get_queries(self, region_clause=""):
         """Get all dashboard queries with optional region filtering"""
-        return {
-            "Repeat Customers":
-                f"""SELECT c.customerid, c.customername, COUNT(DISTINCT o.orderid) AS num_orders
-                FROM customers c JOIN orders o ON c.mobilenumber = o.mobilenumber
-                WHERE TRUE {region_clause}
-                GROUP BY c.customerid, c.customername
-                HAVING COUNT(DISTINCT o.orderid) > 1""",
-
-            "Orders Month-by-Month":
-                f"""SELECT 
-                    DATE_FORMAT(orderdatetime, '%%Y-%%m') AS month,
-                    COUNT(DISTINCT o.orderid) AS total_orders,
-                    SUM(o.totalamount) AS total_revenue,
-                    AVG(o.totalamount) AS avg_order_value,
-                    SUM(o.skucount) AS total_items
-                FROM customers c JOIN orders o ON c.mobilenumber = o.mobilenumber
-                WHERE TRUE {region_clause}
-                GROUP BY month ORDER BY month""",
-
-            "Revenue by Region":
-                f"""SELECT c.region, 
-                    SUM(o.totalamount) AS total_revenue,
-                    COUNT(DISTINCT o.orderid) AS total_orders,
-                    COUNT(DISTINCT c.customerid) AS unique_customers
-                FROM customers c JOIN orders o ON c.mobilenumber = o.mobilenumber
-                WHERE TRUE {region_clause}
-                GROUP BY c.region ORDER BY total_revenue DESC""",
-
-            "Top Revenue Region":
-                """SELECT c.region, SUM(o.totalamount) AS total_revenue 
-                FROM customers c JOIN orders o ON c.mobilenumber = o.mobilenumber 
-                GROUP BY c.region ORDER BY total_revenue DESC LIMIT 1""",
-
-            "Top Spender (Last 30 Days)":
-                f"""SELECT c.customerid, c.customername, SUM(o.totalamount) AS amount_spent
-                FROM customers c JOIN orders o ON c.mobilenumber = o.mobilenumber
-                WHERE o.orderdatetime >= DATE_SUB(NOW(), INTERVAL 30 DAY) {region_clause}
-                GROUP BY c.customerid, c.customername
-                ORDER BY amount_spent DESC LIMIT 1""",
-
-            "Order Value Distribution":
-                f"""SELECT 
-                    CASE 
-                        WHEN o.totalamount < 1000 THEN 'Under ₹1,000'
-                        WHEN o.totalamount < 5000 THEN '₹1,000 - ₹5,000'
-                        WHEN o.totalamount < 10000 THEN '₹5,000 - ₹10,000'
-                        ELSE 'Above ₹10,000'
-                    END AS order_range,
-                    COUNT(DISTINCT o.orderid) AS order_count,
-                    SUM(o.totalamount) AS total_revenue
-                FROM customers c JOIN orders o ON c.mobilenumber = o.mobilenumber
-                WHERE TRUE {region_clause}
-                GROUP BY order_range
-                ORDER BY MIN(o.totalamount)"""
-        }
+        return build_queries(region_clause)
     
     def render_kpi_cards(self, repeat_df, region_df, spender_df):
         """Render KPI cards in the dashboard"""
@@ -148,9 +186,10 @@ class DashboardApp:
 
         with kpi_col1:
             if not repeat_df.empty:
+                top_repeat = repeat_df.iloc[0]
                 st.markdown(
-                    f'<div class="kpi-box">👥 {repeat_df.iloc[0]["customername"]} ({repeat_df.iloc[0]["customerid"]})<br>'
-                    f'<span class="kpi-label">Repeat Customer<br>Orders: <b>{repeat_df.iloc[0]["num_orders"]}</b></span></div>', 
+                    f'<div class="kpi-box">👥 {top_repeat["customername"]} ({top_repeat["customerid"]})<br>'
+                    f'<span class="kpi-label">Repeat Customer<br>Orders: <b>{top_repeat["num_orders"]}</b></span></div>', 
                     unsafe_allow_html=True
                 )
             else:
@@ -158,9 +197,10 @@ class DashboardApp:
 
         with kpi_col2:
             if not region_df.empty:
+                top_region = region_df.iloc[0]
                 st.markdown(
-                    f'<div class="kpi-box">🌍 {region_df.iloc[0]["region"]}<br>'
-                    f'<span class="kpi-label">Top Revenue Region<br>Revenue: <b>{int(region_df.iloc[0]["total_revenue"]):,}</b></span></div>', 
+                    f'<div class="kpi-box">🌍 {top_region["region"]}<br>'
+                    f'<span class="kpi-label">Top Revenue Region<br>Revenue: <b>{int(top_region["total_revenue"]):,}</b></span></div>', 
                     unsafe_allow_html=True
                 )
             else:
@@ -168,9 +208,10 @@ class DashboardApp:
 
         with kpi_col3:
             if not spender_df.empty:
+                top_spender = spender_df.iloc[0]
                 st.markdown(
-                    f'<div class="kpi-box">💸 {spender_df.iloc[0]["customername"]} ({spender_df.iloc[0]["customerid"]})<br>'
-                    f'<span class="kpi-label">Top Spender (30 days)<br>Spent: <b>{int(spender_df.iloc[0]["amount_spent"]):,}</b></span></div>', 
+                    f'<div class="kpi-box">💸 {top_spender["customername"]} ({top_spender["customerid"]})<br>'
+                    f'<span class="kpi-label">Top Spender (30 days)<br>Spent: <b>{int(top_spender["amount_spent"]):,}</b></span></div>', 
                     unsafe_allow_html=True
                 )
             else:
@@ -225,68 +266,94 @@ class DashboardApp:
             with col2:
                 st.subheader("📊 Regional Performance Summary")
                 # Show regional data as formatted table instead of unnecessary bar chart
-                display_regional = revenue_by_region_df.copy()
-                display_regional['Revenue'] = display_regional['total_revenue'].apply(lambda x: f"₹{x:,.0f}")
-                display_regional['Orders'] = display_regional['total_orders']
-                display_regional['Customers'] = display_regional['unique_customers']
-                display_regional['Avg Revenue/Customer'] = (display_regional['total_revenue'] / display_regional['unique_customers']).apply(lambda x: f"₹{x:,.0f}")
+                summary_table = revenue_by_region_df.rename(columns={
+                    'region': 'Region',
+                    'total_revenue': 'Revenue',
+                    'total_orders': 'Orders',
+                    'unique_customers': 'Customers'
+                })
+                summary_table['Avg Revenue/Customer'] = summary_table['Revenue'] / summary_table['Customers']
                 
-                # Show only relevant columns
-                summary_table = display_regional[['region', 'Revenue', 'Orders', 'Customers', 'Avg Revenue/Customer']].rename(columns={'region': 'Region'})
-                st.dataframe(summary_table, use_container_width=True, hide_index=True)
+                # Show only relevant columns; values are formatted at render time by the Styler
+                summary_table = summary_table[['Region', 'Revenue', 'Orders', 'Customers', 'Avg Revenue/Customer']]
+                st.dataframe(
+                    summary_table.style.format({
+                        'Revenue': '₹{:,.0f}',
+                        'Orders': '{:,.0f}',
+                        'Customers': '{:,.0f}',
+                        'Avg Revenue/Customer': '₹{:,.0f}'
+                    }),
+                    use_container_width=True,
+                    hide_index=True
+                )
         
         # Monthly metrics table - more informative than multiple charts
         if not monthly_df.empty:
             st.subheader("📋 Monthly Performance Metrics")
-            display_monthly = monthly_df.copy()
-            display_monthly['Month'] = display_monthly['month']
-            display_monthly['Orders'] = display_monthly['total_orders']
-            display_monthly['Revenue'] = display_monthly['total_revenue'].apply(lambda x: f"₹{x:,.0f}")
-            display_monthly['Avg Order Value'] = display_monthly['avg_order_value'].apply(lambda x: f"₹{x:,.0f}")
-            display_monthly['Total Items'] = display_monthly['total_items']
+            display_monthly = monthly_df.rename(columns={
+                'month': 'Month',
+                'total_orders': 'Orders',
+                'total_revenue': 'Revenue',
+                'avg_order_value': 'Avg Order Value',
+                'total_items': 'Total Items'
+            })
+            summary_cols = ['Month', 'Orders', 'Revenue', 'Avg Order Value', 'Total Items']
+            formats = {
+                'Orders': '{:,.0f}',
+                'Revenue': '₹{:,.0f}',
+                'Avg Order Value': '₹{:,.0f}',
+                'Total Items': '{:,.0f}'
+            }
             
             # Calculate month-over-month growth if multiple months
             if len(display_monthly) > 1:
-                display_monthly['Revenue Growth'] = display_monthly['total_revenue'].pct_change().apply(
-                    lambda x: f"{x:.1%}" if pd.notna(x) else "N/A"
-                )
-                display_monthly['Order Growth'] = display_monthly['total_orders'].pct_change().apply(
-                    lambda x: f"{x:.1%}" if pd.notna(x) else "N/A"
-                )
-                
-                summary_cols = ['Month', 'Orders', 'Revenue', 'Avg Order Value', 'Total Items', 'Revenue Growth', 'Order Growth']
-            else:
-                summary_cols = ['Month', 'Orders', 'Revenue', 'Avg Order Value', 'Total Items']
+                display_monthly['Revenue Growth'] = display_monthly['Revenue'].pct_change()
+                display_monthly['Order Growth'] = display_monthly['Orders'].pct_change()
+                summary_cols += ['Revenue Growth', 'Order Growth']
+                formats.update({'Revenue Growth': '{:.1%}', 'Order Growth': '{:.1%}'})
             
-            st.dataframe(display_monthly[summary_cols], use_container_width=True, hide_index=True)
+            st.dataframe(
+                display_monthly[summary_cols].style.format(formats, na_rep="N/A"),
+                use_container_width=True,
+                hide_index=True
+            )
         
         # Order value distribution - show as simple table, chart not needed for 4 categories
         if not order_distribution_df.empty:
             st.subheader("💳 Order Value Analysis")
             
+            # Totals for the table and the insights, one pass each (non-empty, so no zero divisors)
+            totals = order_distribution_df[['order_count', 'total_revenue']].sum()
+            high_value = order_distribution_df.loc[
+                order_distribution_df['order_range'] == BUCKET_LABELS[-1], ['order_count', 'total_revenue']
+            ].sum()
+            total_orders, total_revenue = int(totals['order_count']), totals['total_revenue']
+            high_value_orders, high_value_revenue = int(high_value['order_count']), high_value['total_revenue']
+            
             col3, col4 = st.columns(2)
             
             with col3:
-                display_distribution = order_distribution_df.copy()
-                display_distribution['Value Range'] = display_distribution['order_range']
-                display_distribution['Orders'] = display_distribution['order_count']
-                display_distribution['Revenue'] = display_distribution['total_revenue'].apply(lambda x: f"₹{x:,.0f}")
-                display_distribution['% of Total Orders'] = (display_distribution['order_count'] / display_distribution['order_count'].sum() * 100).apply(lambda x: f"{x:.1f}%")
-                display_distribution['Avg Order Value'] = (display_distribution['total_revenue'] / display_distribution['order_count']).apply(lambda x: f"₹{x:,.0f}")
+                display_distribution = order_distribution_df.rename(columns={
+                    'order_range': 'Value Range',
+                    'order_count': 'Orders',
+                    'total_revenue': 'Revenue'
+                })
+                display_distribution['% of Total Orders'] = display_distribution['Orders'] / total_orders * 100
+                display_distribution['Avg Order Value'] = display_distribution['Revenue'] / display_distribution['Orders']
                 
                 st.dataframe(
-                    display_distribution[['Value Range', 'Orders', '% of Total Orders', 'Revenue', 'Avg Order Value']], 
+                    display_distribution[['Value Range', 'Orders', '% of Total Orders', 'Revenue', 'Avg Order Value']].style.format({
+                        'Orders': '{:,.0f}',
+                        '% of Total Orders': '{:.1f}%',
+                        'Revenue': '₹{:,.0f}',
+                        'Avg Order Value': '₹{:,.0f}'
+                    }), 
                     use_container_width=True, 
                     hide_index=True
                 )
             
             with col4:
                 # Key insights as text instead of unnecessary charts
-                total_orders = order_distribution_df['order_count'].sum()
-                total_revenue = order_distribution_df['total_revenue'].sum()
-                high_value_orders = order_distribution_df[order_distribution_df['order_range'] == 'Above ₹10,000']['order_count'].sum()
-                high_value_revenue = order_distribution_df[order_distribution_df['order_range'] == 'Above ₹10,000']['total_revenue'].sum()
-                
                 st.markdown("**📈 Key Insights:**")
                 st.markdown(f"• **Total Orders:** {total_orders:,}")
                 st.markdown(f"• **Total Revenue:** ₹{total_revenue:,.0f}")
@@ -319,41 +386,51 @@ class DashboardApp:
             unsafe_allow_html=True
         )
         
-        # Database connection
-        conn = self.get_database_connection()
-        
         try:
             # Region filter
-            regions_query = "SELECT DISTINCT region FROM customers"
-            regions_df = pd.read_sql(regions_query, conn)
-            region_options = ["All"] + regions_df['region'].tolist()
+            regions = load_regions()
+        except Exception as e:
+            st.error(f"Error connecting to Database: {e}")
+            st.stop()
+        
+        region_options = ["All"] + regions
+        filter_col, refresh_col = st.columns([4, 1])
+        with filter_col:
             region_filter = st.selectbox("Filter KPIs by Region (optional)", region_options)
-            
-            # Set up region filtering
-            region_clause = ""
-            params = []
-            if region_filter != "All":
-                region_clause = " AND c.region = %s "
-                params.append(region_filter)
-            
-            # Get queries and execute them
-            queries = self.get_queries(region_clause, params)
-            
-            repeat_df = self.run_query(queries["Repeat Customers"], params, conn)
-            region_df = self.run_query(queries["Top Revenue Region"], conn=conn)
-            spender_df = self.run_query(queries["Top Spender (Last 30 Days)"], params, conn)
-            monthly_df = self.run_query(queries["Orders Month-by-Month"], params, conn)
-            revenue_by_region_df = self.run_query(queries["Revenue by Region"], params, conn)
-            order_distribution_df = self.run_query(queries["Order Value Distribution"], params, conn)
-            
-            # Render dashboard components
-            self.render_kpi_cards(repeat_df, region_df, spender_df)
-            st.markdown("---")
-            self.render_analytics_section(monthly_df, revenue_by_region_df, order_distribution_df)
-            self.render_detail_sections(repeat_df, region_df, spender_df)
-            
-        finally:
-            conn.close()
+        with refresh_col:
+            if st.button("🔄 Refresh data"):
+                # Drop cached query results so the next rerun reads fresh data
+                st.cache_data.clear()
+                st.rerun()
+        
+        # Set up region filtering
+        region_clause = ""
+        params = []
+        if region_filter != "All":
+            region_clause = " AND o.region = %s "
+            params.append(region_filter)
+        
+        # Get queries and execute them
+        queries = self.get_queries(region_clause)
+        
+        query_params = {name: params for name in queries}
+        query_params["Top Revenue Region"] = []  # Not region-filtered
+        results = self.run_queries({
+            name: (query, query_params[name]) for name, query in queries.items()
+        })
+        
+        repeat_df = results["Repeat Customers"]
+        region_df = results["Top Revenue Region"]
+        spender_df = results["Top Spender (Last 30 Days)"]
+        monthly_df = results["Orders Month-by-Month"]
+        revenue_by_region_df = results["Revenue by Region"]
+        order_distribution_df = bucket_order_values(results["Order Value Distribution"])
+        
+        # Render dashboard components
+        self.render_kpi_cards(repeat_df, region_df, spender_df)
+        st.markdown("---")
+        self.render_analytics_section(monthly_df, revenue_by_region_df, order_distribution_df)
+        self.render_detail_sections(repeat_df, region_df, spender_df)
 
 
 def main():
@@ -3,12 +3,16 @@ Dashboard launcher module for the ETL pipeline
 Provides functionality to launch the Streamlit dashboard
 """
 import subprocess
+import importlib.util
 import logging
 import os
 import time
 import webbrowser
 from pathlib import Path
 
+# Seconds a stopping dashboard gets to exit after SIGTERM before it is killed
+STOP_TIMEOUT_SECONDS = 5
+
 class DashboardLauncher:
     """Handles launching and managing the Streamlit dashboard"""
     
@@ -23,12 +27,8 @@ class DashboardLauncher:
         self.dashboard_file = "dashboard_app.py"
     
     def check_streamlit_installed(self):
-        """Check if Streamlit is installed"""
-        try:
-            import streamlit
-            return True
-        except ImportError:
-            return False
+        """Check if Streamlit is installed (without importing it into this process)"""
+        return importlib.util.find_spec("streamlit") is not None
     
     def install_streamlit_dependencies(self):
         """Install required dashboard dependencies"""
@@ -37,9 +37,9 @@ class DashboardLauncher:
         for dep in dependencies:
             try:
                 subprocess.check_call(["pip", "install", dep])
-                logging.info(f"Installed {dep}")
+                logging.info("Installed %s", dep)
             except subprocess.CalledProcessError as e:
-                logging.error(f"Failed to install {dep}: {e}")
+                logging.error("Failed to install %s: %s", dep, e)
                 return False
         return True
     
@@ -57,45 +57,70 @@ class DashboardLauncher:
                 return False
         
         if not Path(self.dashboard_file).exists():
-            logging.error(f"Dashboard file {self.dashboard_file} not found")
+            logging.error("Dashboard file %s not found", self.dashboard_file)
             return False
         
         try:
-            logging.info(f"Launching dashboard on port {self.port}...")
+            logging.info("Launching dashboard on port %s...", self.port)
             
-            # Build streamlit command
+            # Build streamlit command (always headless; the browser is opened below)
             cmd = [
                 "streamlit", "run", self.dashboard_file,
                 "--server.port", str(self.port),
-                "--server.headless", "true" if not auto_open else "false"
+                "--server.headless", "true"
             ]
             
-            # Launch dashboard
+            # Launch dashboard in its own session so terminal signals reach only the
+            # parent, which forwards them. Output is not piped since nothing reads it
+            # (a full pipe would stall the server); errors still reach the terminal
             process = subprocess.Popen(
                 cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+                stdout=subprocess.DEVNULL,
+                start_new_session=True
             )
             
-            # Wait a moment for startup
-            time.sleep(3)
-            
-            if auto_open:
-                dashboard_url = f"http://localhost:{self.port}"
-                logging.info(f"Opening dashboard at {dashboard_url}")
-                webbrowser.open(dashboard_url)
-            
-            logging.info(f"Dashboard launched successfully on port {self.port}")
-            logging.info(f"Access at: http://localhost:{self.port}")
-            logging.info("Press Ctrl+C to stop the dashboard")
+            # Ctrl+C does not reach the detached child, so stop it on any failure or
+            # interrupt until it is handed to the caller
+            try:
+                # Wait a moment for startup
+                time.sleep(3)
+                
+                if auto_open:
+                    dashboard_url = f"http://localhost:{self.port}"
+                    logging.info("Opening dashboard at %s", dashboard_url)
+                    webbrowser.open(dashboard_url)
+                
+                logging.info("Dashboard launched successfully on port %s", self.port)
+                logging.info("Access at: http://localhost:%s", self.port)
+                logging.info("Press Ctrl+C to stop the dashboard")
+            except BaseException:
+                self.stop_dashboard(process)
+                raise
             
             return process
             
         except Exception as e:
-            logging.error(f"Failed to launch dashboard: {e}")
+            logging.error("Failed to launch dashboard: %s", e)
             return None
     
+    @staticmethod
+    def stop_dashboard(process, timeout=STOP_TIMEOUT_SECONDS):
+        """
+        Stop a dashboard process if it is still running
+        
+        Args:
+            process (subprocess.Popen): Dashboard process
+            timeout (float): Seconds to wait after terminating before killing it
+        """
+        if process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    
     def launch_dashboard_background(self):
         """Launch dashboard in background mode"""
         return self.launch_dashboard(auto_open=False)
\ No newline at end of file
@@ -1,53 +1,280 @@
 """
 Data cleaning modules for customers and orders data
 """
+import io
+import os
 import re
+import mmap
 import logging
+from contextlib import contextmanager
+import numpy as np
 import pandas as pd
-import xml.etree.ElementTree as ET
-from datetime import datetime, timezone
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+from lxml import etree
+
+# Validation patterns, compiled once and always applied with fullmatch. Arrow-backed
+# string columns are matched by Arrow's RE2 kernel, which takes the pattern text
+# (.pattern) rather than a compiled Python regex
+MOBILE_NUMBER_RE = re.compile(r'[789]\d{9}')   # Indian format: starts with 7, 8 or 9, 10 digits
+ORDER_ID_RE = re.compile(r'ORD-\d{4}-\d+')
+# Anchored pattern text for Arrow's substring-match kernel
+MOBILE_NUMBER_FULL = f"^{MOBILE_NUMBER_RE.pattern}$"
+
+# Bytes of customer CSV parsed and cleaned at a time
+CSV_BLOCK_SIZE = 64 << 20
+
+# Joins customer_id and mobile_number into one de-duplication key (ASCII unit separator)
+DEDUPE_KEY_SEP = '\x1f'
+
+# String columns with fewer distinct values than this share of rows are dictionary-encoded
+CATEGORY_MAX_RATIO = 0.5
+
+# Integer types tried, smallest first, when narrowing integer columns
+SMALL_UNSIGNED_TYPES = (pa.uint8(), pa.uint16(), pa.uint32())
+SMALL_SIGNED_TYPES = (pa.int8(), pa.int16(), pa.int32())
+
+# CSV header -> output column for customer data
+CUSTOMER_COLUMNS = {
+    'customer_id': 'customerid',
+    'customer_name': 'customername',
+    'mobile_number': 'mobilenumber',
+    'region': 'region'
+}
+CUSTOMER_SCHEMA = pa.schema([(col, pa.string()) for col in CUSTOMER_COLUMNS.values()])
+
+# Output column -> XML tag for each <order> element
+ORDER_FIELDS = {
+    'orderid': 'order_id',
+    'mobilenumber': 'mobile_number',
+    'orderdatetime': 'order_date_time',
+    'skuid': 'sku_id',
+    'skucount': 'sku_count',
+    'totalamount': 'total_amount'
+}
+
+
+@contextmanager
+def _mapped_file(path):
+    """
+    Map a file read-only into memory for the duration of the block
+    
+    Parsers read straight from the page cache instead of copying through
+    buffered file reads. Sequential-readahead hints are applied to both the
+    file and the mapping where the platform supports them, and the file's
+    pages are released from the cache once the block is done.
+    
+    Args:
+        path (str): Path to the file to map
+        
+    Yields:
+        mmap.mmap | bytes: The mapped file (empty bytes for an empty file)
+    """
+    with open(path, 'rb') as f:
+        fd = f.fileno()
+        # mmap cannot map zero bytes
+        if os.fstat(fd).st_size == 0:
+            yield b''
+            return
+        fadvise = getattr(os, 'posix_fadvise', None)
+        if fadvise:
+            fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        try:
+            for advice in ('MADV_SEQUENTIAL', 'MADV_WILLNEED'):
+                if hasattr(mmap, advice):
+                    mm.madvise(getattr(mmap, advice))
+            yield mm
+        finally:
+            mm.close()
+            # Input is read once per run; don't let it crowd out the working set
+            if fadvise:
+                fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def _optimize_types(table, keep=()):
+    """
+    Narrow the column types of a cleaned table before it is loaded
+    
+    Integers are cast to the smallest type that holds them, low-cardinality
+    strings are dictionary-encoded and timestamps drop to second resolution (all
+    the database keeps). Floats are left alone since they hold money amounts.
+    
+    Args:
+        table (pa.Table): Cleaned table
+        keep (tuple): Columns to leave untouched, such as join keys
+        
+    Returns:
+        pa.Table: Table with narrowed column types
+    """
+    for i, field in enumerate(table.schema):
+        column = table.column(i)
+        if field.name in keep or not len(column):
+            continue
+        if pa.types.is_integer(field.type):
+            bounds = pc.min_max(column)
+            low, high = bounds['min'].as_py(), bounds['max'].as_py()
+            candidates = SMALL_UNSIGNED_TYPES if low >= 0 else SMALL_SIGNED_TYPES
+            for narrow in candidates:
+                info = np.iinfo(narrow.to_pandas_dtype())
+                if info.min <= low and high <= info.max:
+                    table = table.set_column(i, field.name, column.cast(narrow))
+                    break
+        elif pa.types.is_timestamp(field.type):
+            table = table.set_column(i, field.name, column.cast(pa.timestamp('s', tz=field.type.tz), safe=False))
+        elif pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+            if pc.count_distinct(column).as_py() < CATEGORY_MAX_RATIO * len(column):
+                table = table.set_column(i, field.name, column.dictionary_encode())
+    return table
+
+
+def _order_keep_mask(df, orderdatetime, skucount, totalamount):
+    """
+    Combine all order validation rules into a single boolean NumPy mask
+    
+    Args:
+        df (pd.DataFrame): Stripped string columns of the parsed orders
+        orderdatetime (pd.Series): Parsed order datetimes (NaT when invalid)
+        skucount (pd.Series): Parsed SKU counts (NaN when invalid)
+        totalamount (pd.Series): Parsed order totals (NaN when invalid)
+        
+    Returns:
+        np.ndarray: True for orders that pass every rule
+    """
+    # Plain float arrays: NaN fails every comparison, so invalid numbers drop out
+    sku = skucount.to_numpy(dtype='float64', na_value=np.nan)
+    amount = totalamount.to_numpy(dtype='float64', na_value=np.nan)
+    return np.logical_and.reduce([
+        # Validate order ID and mobile number formats
+        df['orderid'].str.fullmatch(ORDER_ID_RE.pattern, na=False).to_numpy(dtype=bool),
+        df['mobilenumber'].str.fullmatch(MOBILE_NUMBER_RE.pattern, na=False).to_numpy(dtype=bool),
+        (df['skuid'].str.len() > 0).to_numpy(dtype=bool, na_value=False),
+        orderdatetime.notna().to_numpy(),
+        # Validate business logic constraints
+        sku > 0,
+        sku == np.floor(sku),
+        amount > 0
+    ])
+
 
 class CustomerCleaner:
     """Handles cleaning and validation of customer data from CSV files"""
     
     @staticmethod
-    def clean_customers(csv_file):
+    def clean_customers(csv_file, block_size=CSV_BLOCK_SIZE):
         """
         Clean and validate customer data from CSV file
         
         Args:
             csv_file (str): Path to the CSV file containing customer data
+            block_size (int): Bytes of CSV to read and clean at a time
             
         Returns:
-            pd.DataFrame: Cleaned customer dataframe
+            pa.Table: Cleaned customer table
+        """
+        chunks = list(CustomerCleaner.iter_clean_customers(csv_file, block_size))
+        table = pa.concat_tables(chunks) if chunks else CUSTOMER_SCHEMA.empty_table()
+        return _optimize_types(table, keep=('customerid', 'mobilenumber'))
+    
+    @staticmethod
+    def iter_clean_customers(csv_file, block_size=CSV_BLOCK_SIZE):
+        """
+        Clean and validate customer data from CSV file one block at a time
+        
+        The file is streamed through Arrow's multi-threaded CSV reader in record
+        batches, so callers can load each chunk while the next one is parsed.
+        
+        Args:
+            csv_file (str): Path to the CSV file containing customer data
+            block_size (int): Bytes of CSV to read and clean at a time
+            
+        Yields:
+            pa.Table: Cleaned customers not already yielded in an earlier chunk
         """
-        df = pd.read_csv(csv_file)
+        # Combined customer_id/mobile_number keys of the rows already yielded
+        seen = []
+        total = 0
+        with _mapped_file(csv_file) as mm:
+            # Read everything as nullable strings so missing values stay null
+            # and phone numbers keep their digits
+            source = pa.BufferReader(mm)
+            reader = pacsv.open_csv(
+                source,
+                read_options=pacsv.ReadOptions(block_size=block_size),
+                convert_options=pacsv.ConvertOptions(
+                    column_types={col: pa.string() for col in CUSTOMER_COLUMNS},
+                    include_columns=list(CUSTOMER_COLUMNS),
+                    strings_can_be_null=True
+                )
+            )
+            try:
+                for batch in reader:
+                    table = CustomerCleaner._drop_duplicate_keys(
+                        pa.Table.from_batches([CustomerCleaner._clean_batch(batch)]), seen
+                    )
+                    if len(table):
+                        total += len(table)
+                        yield table
+            finally:
+                # Release Arrow's views of the mapping before it is unmapped
+                del reader, source
         
-        # Clean and strip whitespace from string columns
-        for col in ["customer_id", "customer_name", "mobile_number", "region"]:
-            df[col] = df[col].astype(str).str.strip()
+        logging.info("Cleaned customers: %s rows", total)
+    
+    @staticmethod
+    def _drop_duplicate_keys(table, seen):
+        """
+        Remove duplicates based on customer_id and mobile_number
         
-        # Remove duplicates based on customer_id and mobile_number
-        df = df.drop_duplicates(subset=['customer_id', 'mobile_number'])
+        Keeps the first row of each key that is not already in an earlier chunk,
+        in file order.
         
-        # Validate mobile numbers (Indian format: starts with 7, 8, or 9 and has 10 digits)
-        df = df[df['mobile_number'].str.match(r'^[789]\d{9}$')]
+        Args:
+            table (pa.Table): Cleaned customer rows of one chunk
+            seen (list): Key arrays of earlier chunks; the kept keys are appended
+            
+        Returns:
+            pa.Table: Rows with keys not seen before
+        """
+        keys = pc.binary_join_element_wise(
+            table['customerid'], table['mobilenumber'], DEDUPE_KEY_SEP
+        ).combine_chunks()
+        if seen:
+            fresh = pc.invert(pc.is_in(keys, value_set=pa.concat_arrays(seen)))
+            table, keys = table.filter(fresh), keys.filter(fresh)
         
-        # Remove rows with missing critical data
-        df = df.dropna(subset=['customer_id', 'customer_name', 'mobile_number', 'region'])
+        # Row number of the first occurrence of each key, back in file order
+        first_rows = pa.table({'key': keys, 'row': np.arange(len(keys))}).group_by(
+            'key', use_threads=False
+        ).aggregate([('row', 'min')])['row_min'].combine_chunks()
+        first_rows = pc.take(first_rows, pc.sort_indices(first_rows))
         
-        # Standardize region names to title case
-        df['region'] = df['region'].str.title()
+        seen.append(keys.take(first_rows))
+        return table.take(first_rows)
+    
+    @staticmethod
+    def _clean_batch(batch):
+        """Strip, validate and standardize one record batch of raw customer rows"""
+        # Clean and strip whitespace from string columns, renaming for database compatibility
+        batch = pa.RecordBatch.from_arrays(
+            [pc.utf8_trim_whitespace(batch.column(col)) for col in CUSTOMER_COLUMNS],
+            names=list(CUSTOMER_COLUMNS.values())
+        )
         
-        # Rename columns for database compatibility
-        df = df.rename(columns={
-            "customer_id": "customerid",
-            "customer_name": "customername",
-            "mobile_number": "mobilenumber"
-        })
+        # Remove rows with missing critical data (before the regex, to shrink its input)
+        batch = pc.drop_null(batch)
         
-        logging.info(f"Cleaned customers: {len(df)} rows")
-        return df
+        # Validate mobile numbers (Indian format: starts with 7, 8, or 9 and has 10 digits)
+        batch = batch.filter(
+            pc.match_substring_regex(batch.column('mobilenumber'), MOBILE_NUMBER_FULL)
+        )
+        
+        # Standardize region names to title case
+        return batch.set_column(
+            batch.schema.get_field_index('region'), 'region', pc.utf8_title(batch.column('region'))
+        )
 
 
 class OrderCleaner:
@@ -62,47 +289,57 @@ class OrderCleaner:
             xml_file (str): Path to the XML file containing order data
             
         Returns:
-            pd.DataFrame: Cleaned orders dataframe
+            pa.Table: Cleaned orders table
         """
-        tree = ET.parse(xml_file)
-        root = tree.getroot()
-        records = []
+        # Stream <order> elements from the mapped file into per-column lists instead
+        # of building the full DOM
+        columns = {col: [] for col in ORDER_FIELDS}
+        with _mapped_file(xml_file) as mm:
+            source = mm if isinstance(mm, mmap.mmap) else io.BytesIO(mm)
+            # Trusted, DTD-less input: no entity expansion, DTD loading or network access;
+            # huge_tree lifts libxml2's depth/text-size limits for very large exports
+            events = etree.iterparse(
+                source, events=("end",), tag="order",
+                huge_tree=True, resolve_entities=False, no_network=True,
+                load_dtd=False, remove_blank_text=True
+            )
+            # Column list appends bound once, not looked up again for every order
+            fields = [(columns[col].append, tag) for col, tag in ORDER_FIELDS.items()]
+            for _, order in events:
+                # One pass over the children instead of a findtext() path search per
+                # field; reversed so the first of any repeated tag wins, as with findtext
+                texts = {child.tag: child.text for child in reversed(order)}
+                for append, tag in fields:
+                    append(texts.get(tag))
+                # Free the finished element and the already-processed siblings still
+                # attached to the root, so memory stays flat regardless of file size
+                order.clear()
+                while order.getprevious() is not None:
+                    del order.getparent()[0]
         
-        for order in root.findall('order'):
-            try:
-                # Extract and clean order data
-                orderid = order.find('order_id').text.strip()
-                mobilenumber = order.find('mobile_number').text.strip()
-                dt = order.find('order_date_time').text.strip()
-                skuid = order.find('sku_id').text.strip()
-                skucount = int(order.find('sku_count').text.strip())
-                totalamount = float(order.find('total_amount').text.strip())
-                
-                # Parse and format datetime
-                dt_parsed = datetime.strptime(dt, "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)
-                orderdatetime = dt_parsed.strftime('%Y-%m-%d %H:%M:%S')
-                
-                # Validate order ID format
-                if not re.match(r'^ORD-\d{4}-\d+$', orderid):
-                    continue
-                
-                # Validate mobile number format
-                if not re.match(r'^[789]\d{9}$', mobilenumber):
-                    continue
-                
-                # Validate business logic constraints
-                if skucount <= 0 or totalamount <= 0:
-                    continue
-                
-                records.append([orderid, mobilenumber, orderdatetime, skuid, skucount, totalamount])
-                
-            except Exception as e:
-                logging.error(f"Skipping order: {e}")
-        
-        df = pd.DataFrame(records, columns=[
-            'orderid', 'mobilenumber', 'orderdatetime', 
-            'skuid', 'skucount', 'totalamount'
-        ])
-        
-        logging.info(f"Cleaned orders: {len(df)} rows")
-        return df
\ No newline at end of file
+        df = pd.DataFrame(columns, dtype="string[pyarrow]")
+        df = df.apply(lambda col: col.str.strip())
+        
+        # Parse datetimes and numbers column-wise; malformed values become NaT/NaN.
+        # cache=True parses each distinct timestamp string only once
+        orderdatetime = pd.to_datetime(
+            df['orderdatetime'], format="%Y-%m-%dT%H:%M:%S", utc=True, errors='coerce', cache=True
+        )
+        skucount = pd.to_numeric(df['skucount'], errors='coerce')
+        totalamount = pd.to_numeric(df['totalamount'], errors='coerce')
+        
+        valid = _order_keep_mask(df, orderdatetime, skucount, totalamount)
+        
+        skipped = len(df) - int(valid.sum())
+        if skipped:
+            logging.warning("Skipped %s invalid orders", skipped)
+        
+        df = df[valid].reset_index(drop=True)
+        # Keep timestamps as naive UTC datetimes; the database driver takes them directly
+        df['orderdatetime'] = orderdatetime[valid].dt.tz_localize(None).to_numpy()
+        df['skucount'] = skucount[valid].astype('int64').to_numpy()
+        df['totalamount'] = totalamount[valid].astype('float64').to_numpy()
+        
+        logging.info("Cleaned orders: %s rows", len(df))
+        table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata()
+        return _optimize_types(table, keep=('mobilenumber',))
\ No newline at end of file
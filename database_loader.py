@@ -2,9 +2,136 @@
 Database loading module for ETL pipeline
 Handles data insertion into MySQL database
 """
+import os
 import logging
+import tempfile
+from datetime import datetime
+from typing import Union
 import pandas as pd
-from sqlalchemy import Engine
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+from sqlalchemy import (
+    Column, Computed, Connection, DateTime, Engine, ForeignKey, Index, Integer, MetaData,
+    Numeric, SmallInteger, String, Table, UniqueConstraint, delete, insert, select
+)
+
+# MySQL error codes meaning LOAD DATA LOCAL INFILE is disabled on the client or server
+LOCAL_INFILE_DISABLED_ERRORS = {1148, 2068, 3948}
+
+# Rows sent per executemany() call when falling back to INSERT statements. The driver
+# interpolates the values client-side into one multi-row INSERT per call, which must
+# fit in the server's max_allowed_packet (4 MiB by default before MySQL 8.0), so a
+# batch is also capped at an estimated INSERT_BATCH_BYTES of statement text
+INSERT_BATCH_ROWS = 10_000
+INSERT_BATCH_BYTES = 2 * 1024 * 1024
+# Estimated text per value besides string contents: quotes, separator, and the
+# rendered width of a number or datetime
+INSERT_VALUE_BYTES = 24
+
+# Secondary order indexes dropped while bulk loading into an empty table and built once
+# afterwards. idx_orders_customerid stays, since MySQL requires it for the foreign key
+DEFERRED_ORDER_INDEXES = (
+    "idx_orders_orderid", "idx_orders_mobilenumber", "idx_orders_region_date",
+    "idx_orders_amount_bucket"
+)
+
+# Lower edges of the order value ranges reported by the dashboard; orders.amount_bucket
+# numbers the range each order falls in, from 0 below the first edge
+ORDER_VALUE_EDGES = (1000, 5000, 10000)
+
+# Customer columns used for stamping customer details onto orders
+CUSTOMER_LOOKUP_SCHEMA = pa.schema([
+    ("mobilenumber", pa.string()),
+    ("customerid", pa.string()),
+    ("region", pa.string())
+])
+
+# Keys per IN (...) list when looking up stored customers or replacing stored orders
+LOOKUP_BATCH_KEYS = 1_000
+
+# Cleaned data arrives as Arrow tables; pandas dataframes are accepted as well
+TableLike = Union[pa.Table, pd.DataFrame]
+
+metadata = MetaData()
+
+customers_table = Table(
+    "customers", metadata,
+    Column("customerid", String(50), primary_key=True),
+    Column("customername", String(255)),
+    Column("mobilenumber", String(15), nullable=False),
+    Column("region", String(100)),
+    UniqueConstraint("mobilenumber", name="uk_customers_mobilenumber")
+)
+
+orders_table = Table(
+    "orders", metadata,
+    Column("orderid", String(50)),
+    # Denormalized from customers at load time: customerid for joins on the
+    # primary key, region so region-filtered reports need no join at all
+    Column("customerid", String(50), ForeignKey("customers.customerid")),
+    Column("mobilenumber", String(15)),
+    Column("region", String(100)),
+    Column("orderdatetime", DateTime),
+    Column("skuid", String(50)),
+    Column("skucount", Integer),
+    Column("totalamount", Numeric(10, 2)),
+    # Stored by the database on write, so reports group by an indexed value
+    Column("amount_bucket", SmallInteger, Computed(
+        " + ".join(f"(totalamount >= {edge})" for edge in ORDER_VALUE_EDGES), persisted=True
+    )),
+    Index("idx_orders_orderid", "orderid"),
+    Index("idx_orders_customerid", "customerid"),
+    Index("idx_orders_mobilenumber", "mobilenumber"),
+    Index("idx_orders_region_date", "region", "orderdatetime", "totalamount"),
+    Index("idx_orders_amount_bucket", "amount_bucket", "orderid", "totalamount")
+)
+
+# SHA-256 of the source file last loaded into each table, so unchanged inputs can be skipped
+ingest_log_table = Table(
+    "etl_ingest_log", metadata,
+    Column("table_name", String(64), primary_key=True),
+    Column("source_digest", String(64), nullable=False),
+    Column("loaded_at", DateTime, nullable=False)
+)
+
+
+def _as_table(data: TableLike) -> pa.Table:
+    """Return data as an Arrow table, converting a pandas dataframe if needed"""
+    if isinstance(data, pa.Table):
+        return data
+    return pa.Table.from_pandas(data, preserve_index=False)
+
+
+def _to_arrow(data: TableLike, columns: list) -> pa.Table:
+    """Select the given columns, in order, as an Arrow table with timestamps in whole seconds"""
+    table = _as_table(data).select(columns)
+    # DATETIME columns have whole-second precision; drop fractions (and get plain datetimes)
+    return table.cast(pa.schema([
+        pa.field(field.name, pa.timestamp('s')) if pa.types.is_timestamp(field.type) else field
+        for field in table.schema
+    ]), safe=False)
+
+
+def _estimated_row_bytes(table: pa.Table) -> float:
+    """Average length of a row once rendered as INSERT ... VALUES text"""
+    string_bytes = 0
+    for column in table.columns:
+        if pa.types.is_dictionary(column.type):
+            column = column.cast(column.type.value_type)
+        if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            string_bytes += pc.sum(pc.binary_length(column)).as_py() or 0
+    return string_bytes / max(len(table), 1) + INSERT_VALUE_BYTES * table.num_columns
+
+
+def _first_per_key(table: pa.Table, key: str) -> pa.Table:
+    """Keep the first row for each value of the key column, in table order"""
+    first_rows = pa.table({'key': table[key], 'row': np.arange(len(table))}).group_by(
+        'key', use_threads=False
+    ).aggregate([('row', 'min')])['row_min'].combine_chunks()
+    return table.take(pc.take(first_rows, pc.sort_indices(first_rows)))
+
 
 class DatabaseLoader:
     """Handles loading data into MySQL database"""
@@ -17,32 +144,231 @@ class DatabaseLoader:
             engine (Engine): SQLAlchemy database engine
         """
         self.engine = engine
+        # Customer lookup columns of every loaded chunk, for stamping details onto orders;
+        # None while chunks are not kept (see begin_customer_load)
+        self._customer_chunks = None
+        # LOAD DATA LOCAL INFILE is MySQL-only; once the server or client refuses it,
+        # later loads go straight to batched inserts instead of failing again
+        self._use_local_infile = engine.dialect.name == "mysql"
+        
+        # Statements depend only on the table schema, so build and compile them once.
+        # Generated columns are computed by the database and never loaded
+        self._columns = {
+            name: [col.name for col in table.columns if col.computed is None]
+            for name, table in metadata.tables.items()
+        }
+        self._insert_sql = {}
+        for name, table in metadata.tables.items():
+            # Rows clashing with a stored key are skipped, as LOAD DATA ... IGNORE does
+            compiled = (
+                table.insert()
+                .prefix_with("IGNORE", dialect="mysql")
+                .prefix_with("OR IGNORE", dialect="sqlite")
+                .compile(dialect=engine.dialect, column_keys=self._columns[name])
+            )
+            self._insert_sql[name] = (str(compiled), compiled.positional)
+        self._load_data_sql = {name: self._build_load_data_sql(name) for name in metadata.tables}
+    
+    def create_tables(self):
+        """Create the customers, orders and ingest log tables (with keys and indexes) if missing"""
+        metadata.create_all(self.engine)
+    
+    def get_source_digest(self, table_name: str):
+        """Return the digest of the source file last loaded into a table, or None"""
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(ingest_log_table.c.source_digest)
+                .where(ingest_log_table.c.table_name == table_name)
+            ).scalar_one_or_none()
+    
+    def record_source_digest(self, table_name: str, digest: str):
+        """Record the digest of the source file just loaded into a table"""
+        with self.engine.begin() as conn:
+            conn.execute(delete(ingest_log_table).where(ingest_log_table.c.table_name == table_name))
+            conn.execute(insert(ingest_log_table).values(
+                table_name=table_name, source_digest=digest, loaded_at=datetime.now()
+            ))
     
-    def load_to_mysql(self, df: pd.DataFrame, table_name: str):
+    def load_to_mysql(self, data: TableLike, table_name: str, replace_column: str = None,
+                      replace_keys: list = None):
         """
-        Load dataframe to MySQL table
+        Load a table to MySQL table
+        
+        Uses LOAD DATA LOCAL INFILE when available and falls back to batched
+        INSERTs on other backends or if local infile is disabled. Both paths
+        skip rows whose primary or unique key is already stored. The table
+        must already exist (see create_tables).
         
         Args:
-            df (pd.DataFrame): DataFrame to load
+            data (pa.Table | pd.DataFrame): Rows to load
             table_name (str): Target table name
+            replace_column (str): Column identifying the rows being replaced
+            replace_keys (list): Values of replace_column whose stored rows are deleted in
+                the same transaction as the load, so a failed load keeps the old rows
         """
+        table = _to_arrow(data, self._columns[table_name])
         try:
-            df.to_sql(
-                table_name, 
-                con=self.engine, 
-                if_exists='append', 
-                index=False, 
-                method='multi'
-            )
-            logging.info(f"Successfully loaded {len(df)} rows into {table_name}")
+            loaded = False
+            if self._use_local_infile:
+                try:
+                    self._load_in_transaction(
+                        self._load_data_infile, table, table_name, replace_column, replace_keys
+                    )
+                    loaded = True
+                except Exception as e:
+                    # SQLAlchemy wraps driver errors; the MySQL error code is on the original
+                    if getattr(getattr(e, 'orig', e), 'errno', None) not in LOCAL_INFILE_DISABLED_ERRORS:
+                        raise
+                    logging.warning("LOAD DATA LOCAL INFILE unavailable (%s); using batched inserts", e)
+                    self._use_local_infile = False
+            if not loaded:
+                self._load_in_transaction(
+                    self._insert_rows, table, table_name, replace_column, replace_keys
+                )
+            logging.info("Successfully loaded %s rows into %s", len(data), table_name)
         except Exception as e:
-            logging.error(f"Failed to load data into {table_name}: {e}")
+            logging.error("Failed to load data into %s: %s", table_name, e)
             raise
     
-    def load_customers(self, customers_df: pd.DataFrame):
+    def _build_load_data_sql(self, table_name: str) -> str:
+        """Build the LOAD DATA LOCAL INFILE statement for a table's columns, in schema order"""
+        columns = self._columns[table_name]
+        # Read each field into a user variable so empty fields load as NULL
+        variables = ", ".join(f"@c{i}" for i in range(len(columns)))
+        assignments = ", ".join(f"`{col}` = NULLIF(@c{i}, '')" for i, col in enumerate(columns))
+        return (
+            f"LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE `{table_name}` "
+            "CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+            "LINES TERMINATED BY '\\n' "
+            f"({variables}) SET {assignments}"
+        )
+    
+    def _load_in_transaction(self, load, table: pa.Table, table_name: str,
+                             replace_column: str = None, replace_keys: list = None):
+        """Run one load method in a transaction, after deleting the stored rows it replaces"""
+        with self.engine.begin() as conn:
+            if replace_keys:
+                target = metadata.tables[table_name]
+                for start in range(0, len(replace_keys), LOOKUP_BATCH_KEYS):
+                    batch = replace_keys[start:start + LOOKUP_BATCH_KEYS]
+                    conn.execute(delete(target).where(target.c[replace_column].in_(batch)))
+            load(conn, table, table_name)
+    
+    def _load_data_infile(self, conn: Connection, table: pa.Table, table_name: str):
+        """Bulk load rows through a temporary CSV file and LOAD DATA LOCAL INFILE"""
+        tmp = tempfile.NamedTemporaryFile(suffix='.csv', delete=False)
+        try:
+            # Arrow's columnar C++ CSV writer; nulls are written as empty unquoted fields
+            with tmp:
+                pacsv.write_csv(table, tmp, pacsv.WriteOptions(include_header=False))
+            conn.exec_driver_sql(self._load_data_sql[table_name], (tmp.name,))
+        finally:
+            # Removed even if writing the file fails
+            os.remove(tmp.name)
+    
+    def _insert_rows(self, conn: Connection, table: pa.Table, table_name: str):
+        """Load rows by executing the precompiled INSERT over batches of rows"""
+        sql, positional = self._insert_sql[table_name]
+        batch_rows = max(1, min(INSERT_BATCH_ROWS, int(INSERT_BATCH_BYTES // _estimated_row_bytes(table))))
+        for batch in table.to_batches(max_chunksize=batch_rows):
+            # Plain Python values with None for missing data, shaped for the driver's paramstyle
+            if positional:
+                rows = list(zip(*(col.to_pylist() for col in batch.columns)))
+            else:
+                rows = batch.to_pylist()
+            conn.exec_driver_sql(sql, rows)
+    
+    def load_customers(self, customers: TableLike):
         """Load customers data to database"""
-        self.load_to_mysql(customers_df, "customers")
+        self.begin_customer_load()
+        self.load_customers_chunk(customers)
+    
+    def begin_customer_load(self):
+        """
+        Forget the customers kept from earlier loads; call before loading a new set of chunks
+        
+        Chunks are kept only when the customers table starts out empty. Otherwise a
+        loaded row may have been skipped in favour of a stored customer with the same
+        key, and orders are stamped from the table instead.
+        """
+        self._customer_chunks = [] if not self._has_rows(customers_table) else None
+    
+    def load_customers_chunk(self, customers: TableLike):
+        """Append one chunk of cleaned customers to the database (see begin_customer_load)"""
+        customers = _as_table(customers)
+        self.load_to_mysql(customers, "customers")
+        # Kept for stamping customer details onto orders without a database round-trip
+        if self._customer_chunks is not None:
+            self._customer_chunks.append(
+                customers.select(CUSTOMER_LOOKUP_SCHEMA.names).cast(CUSTOMER_LOOKUP_SCHEMA)
+            )
+    
+    def load_orders(self, orders: TableLike, defer_indexes: bool = True):
+        """
+        Load orders data to database, stamped with their customer's id and region
+        
+        Reloaded orders replace the stored lines of the same order ids. The old lines
+        are deleted in the same transaction that loads the new ones.
+        
+        Args:
+            orders (pa.Table | pd.DataFrame): Cleaned orders
+            defer_indexes (bool): When the table is empty, build its secondary indexes
+                once after the load instead of maintaining them row by row
+        """
+        orders = _as_table(orders)
+        has_rows = self._has_rows(orders_table)
+        # Every order id of the input is replaced, including orders now left without a customer
+        replace_keys = pc.unique(orders['orderid'].combine_chunks()).to_pylist() if has_rows else None
+        orders = self._with_customer_details(orders)
+        indexes = []
+        if defer_indexes and not has_rows:
+            indexes = [index for index in orders_table.indexes if index.name in DEFERRED_ORDER_INDEXES]
+        for index in indexes:
+            index.drop(self.engine, checkfirst=True)
+        try:
+            self.load_to_mysql(orders, "orders", replace_column="orderid", replace_keys=replace_keys)
+        finally:
+            # Rebuilt even if the load fails, so the table never stays unindexed
+            for index in indexes:
+                index.create(self.engine, checkfirst=True)
+    
+    def _has_rows(self, table: Table) -> bool:
+        """Return whether a table holds at least one row"""
+        with self.engine.connect() as conn:
+            return conn.execute(select(table.c[0]).limit(1)).first() is not None
     
-    def load_orders(self, orders_df: pd.DataFrame):
-        """Load orders data to database"""
-        self.load_to_mysql(orders_df, "orders")
\ No newline at end of file
+    def _stored_customers(self, mobile_numbers: list) -> pa.Table:
+        """Fetch the lookup columns of stored customers with the given mobile numbers"""
+        columns = [customers_table.c[name] for name in CUSTOMER_LOOKUP_SCHEMA.names]
+        rows = []
+        with self.engine.connect() as conn:
+            for start in range(0, len(mobile_numbers), LOOKUP_BATCH_KEYS):
+                batch = mobile_numbers[start:start + LOOKUP_BATCH_KEYS]
+                rows.extend(conn.execute(
+                    select(*columns).where(customers_table.c.mobilenumber.in_(batch))
+                ).all())
+        return pa.Table.from_pylist([row._asdict() for row in rows], schema=CUSTOMER_LOOKUP_SCHEMA)
+    
+    def _with_customer_details(self, orders: pa.Table) -> pa.Table:
+        """Join each order to the customer owning its mobile number, dropping orphan orders"""
+        lookup = pa.concat_tables([CUSTOMER_LOOKUP_SCHEMA.empty_table(), *(self._customer_chunks or [])])
+        # Customers loaded by earlier runs are not in memory; fetch those orders' numbers
+        order_numbers = pc.unique(orders['mobilenumber'].cast(pa.string()).combine_chunks())
+        missing = order_numbers.filter(pc.invert(pc.is_in(order_numbers, value_set=lookup['mobilenumber'])))
+        if len(missing):
+            lookup = pa.concat_tables([lookup, self._stored_customers(missing.to_pylist())])
+        
+        # Customers with different ids can share a mobile number; keep the first
+        # customer per number so the join matches each order at most once
+        key_type = orders.schema.field('mobilenumber').type
+        lookup = _first_per_key(lookup, 'mobilenumber')
+        known_numbers = lookup['mobilenumber']
+        lookup = lookup.set_column(0, 'mobilenumber', known_numbers.cast(key_type))
+        matched = orders.join(lookup, keys='mobilenumber', join_type='inner')
+        
+        has_customer = pc.is_in(orders['mobilenumber'].cast(known_numbers.type), value_set=known_numbers)
+        unmatched = pc.sum(pc.invert(has_customer)).as_py() or 0
+        if unmatched:
+            logging.warning("Skipped %s orders with no matching customer", unmatched)
+        return matched
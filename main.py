@@ -2,9 +2,10 @@
 Entry point for the Akasa Air ETL Pipeline
 Handles command line arguments and initializes the pipeline
 """
+import signal
 import argparse
 import logging
-from pipeline import ETLPipeline
+from dashboard_launcher import DashboardLauncher
 
 def setup_logging():
     """Configure logging for the application"""
@@ -37,43 +38,84 @@ def parse_arguments():
         action="store_true",
         help="Launch only the dashboard (skip ETL processing)"
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Reprocess input files even if unchanged since their last load"
+    )
     return parser.parse_args()
 
+def wait_for_dashboard(dashboard_process):
+    """
+    Block until the dashboard process exits, forwarding Ctrl+C and SIGTERM to it
+    
+    The dashboard runs in its own session, so the parent relays stop signals.
+    On platforms without sigwait (Windows) it simply waits on the process.
+    
+    Args:
+        dashboard_process (subprocess.Popen): Running dashboard process
+    """
+    if not hasattr(signal, "sigwait"):
+        try:
+            dashboard_process.wait()
+        except KeyboardInterrupt:
+            logging.info("Dashboard stopped by user")
+        return
+    
+    # macOS and the BSDs discard a SIGCHLD left at its default (ignore) action even
+    # while it is blocked, so sigwait() would never see the child exit; a no-op
+    # handler keeps it pending
+    previous_sigchld = signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+    # Block the signals first so none can arrive between poll() and sigwait()
+    watched = {signal.SIGINT, signal.SIGTERM, signal.SIGCHLD}
+    signal.pthread_sigmask(signal.SIG_BLOCK, watched)
+    try:
+        while dashboard_process.poll() is None:
+            sig = signal.sigwait(watched)
+            if sig != signal.SIGCHLD:
+                logging.info("Dashboard stopped by user")
+                dashboard_process.send_signal(sig)
+    finally:
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, watched)
+        signal.signal(signal.SIGCHLD, previous_sigchld)
+
+
 def main():
     """Main entry point for the application"""
     setup_logging()
     args = parse_arguments()
+    dashboard_process = None
     
     try:
-        pipeline = ETLPipeline()
-        
         if args.dashboard_only:
-            # Launch only dashboard
-            dashboard_process = pipeline.launch_dashboard_only()
+            # Launch only dashboard; needs neither the database nor the ETL modules
+            dashboard_process = DashboardLauncher().launch_dashboard()
             if dashboard_process:
-                try:
-                    dashboard_process.wait()
-                except KeyboardInterrupt:
-                    logging.info("Dashboard stopped by user")
+                wait_for_dashboard(dashboard_process)
         else:
             # Validate required arguments for ETL
             if not args.customers or not args.orders:
                 logging.error("--customers and --orders are required for ETL processing")
                 exit(1)
             
+            # Imported here so --dashboard-only starts without loading pandas, Arrow or SQLAlchemy
+            from pipeline import ETLPipeline
+            pipeline = ETLPipeline()
+            
             # Run ETL pipeline
-            dashboard_process = pipeline.run(args.customers, args.orders, args.dashboard)
+            dashboard_process = pipeline.run(args.customers, args.orders, args.dashboard, force=args.force)
             
             # If dashboard was launched, wait for user to stop it
             if dashboard_process:
-                try:
-                    dashboard_process.wait()
-                except KeyboardInterrupt:
-                    logging.info("Dashboard stopped by user")
+                wait_for_dashboard(dashboard_process)
                     
     except Exception as e:
-        logging.error(f"Application failed: {e}")
+        logging.error("Application failed: %s", e)
         exit(1)
+    finally:
+        # The dashboard runs detached from the terminal; never leave it serving on its own
+        if dashboard_process:
+            DashboardLauncher.stop_dashboard(dashboard_process)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
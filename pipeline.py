@@ -2,25 +2,48 @@
 Main ETL Pipeline orchestrator
 Coordinates the entire data processing workflow
 """
+import queue
+import hashlib
 import logging
-from config import Config
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from config import get_config
 from data_cleaners import CustomerCleaner, OrderCleaner
 from database_loader import DatabaseLoader
 from dashboard_launcher import DashboardLauncher
 
+# Cleaned customer chunks buffered between the cleaner and the database loader
+LOAD_QUEUE_CHUNKS = 4
+
+# Bytes read per hash update when hashlib.file_digest is unavailable (Python < 3.11)
+DIGEST_READ_SIZE = 1 << 20
+
+
+def _file_digest(path: str) -> str:
+    """Return the SHA-256 hex digest of a file's contents"""
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        digest = hashlib.sha256()
+        for block in iter(lambda: f.read(DIGEST_READ_SIZE), b''):
+            digest.update(block)
+        return digest.hexdigest()
+
+
 class ETLPipeline:
     """Main ETL Pipeline class that orchestrates the data processing workflow"""
     
     def __init__(self):
         """Initialize pipeline with configuration and database connection"""
-        self.config = Config()
+        self.config = get_config()
         self.engine = self.config.get_database_engine()
         self.db_loader = DatabaseLoader(self.engine)
         self.customer_cleaner = CustomerCleaner()
         self.order_cleaner = OrderCleaner()
         self.dashboard_launcher = DashboardLauncher()
     
-    def run(self, customers_csv: str, orders_xml: str, launch_dashboard: bool = False):
+    def run(self, customers_csv: str, orders_xml: str, launch_dashboard: bool = False,
+            force: bool = False):
         """
         Execute the complete ETL pipeline
         
@@ -28,22 +51,36 @@ class ETLPipeline:
             customers_csv (str): Path to customers CSV file
             orders_xml (str): Path to orders XML file
             launch_dashboard (bool): Whether to launch dashboard after processing
+            force (bool): Reprocess input files even if unchanged since their last load
         """
         logging.info("Starting ETL pipeline...")
         
         try:
-            # Extract and clean customer data
-            logging.info("Processing customer data...")
-            customers_df = self.customer_cleaner.clean_customers(customers_csv)
-            
-            # Extract and clean order data
-            logging.info("Processing order data...")
-            orders_df = self.order_cleaner.clean_orders(orders_xml)
+            self.db_loader.create_tables()
+            # Inputs identical to the last loaded ones are neither cleaned nor loaded again.
+            # Orders are stamped from customers (and orphans dropped) at load time, so new
+            # customers also reload the orders to pick up lines that had no customer before
+            customers_digest = self._changed_digest(customers_csv, "customers", force)
+            orders_digest = self._changed_digest(
+                orders_xml, "orders", force or customers_digest is not None
+            )
             
-            # Load data to database
-            logging.info("Loading data to database...")
-            self.db_loader.load_customers(customers_df)
-            self.db_loader.load_orders(orders_df)
+            # Clean orders in a worker process (the cleaners are stateless static
+            # methods, so they pickle by reference) while customers are cleaned and
+            # loaded chunk by chunk here
+            logging.info("Processing customer and order data...")
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                if orders_digest:
+                    orders_future = executor.submit(self.order_cleaner.clean_orders, orders_xml)
+                
+                logging.info("Loading data to database...")
+                if customers_digest:
+                    self._stream_customers(customers_csv)
+                    self.db_loader.record_source_digest("customers", customers_digest)
+                # Orders are loaded after customers since they are stamped with customer details
+                if orders_digest:
+                    self.db_loader.load_orders(orders_future.result())
+                    self.db_loader.record_source_digest("orders", orders_digest)
             
             logging.info("ETL pipeline completed successfully!")
             
@@ -56,12 +93,75 @@ class ETLPipeline:
                     return dashboard_process
             
         except Exception as e:
-            logging.error(f"Pipeline failed: {e}")
+            logging.error("Pipeline failed: %s", e)
+            # Drop pooled connections that may be left mid-transaction; the next
+            # run starts from a fresh pool
+            self.close()
             raise
-        finally:
-            # Clean up database connection
-            if hasattr(self, 'engine'):
-                self.engine.dispose()
+    
+    def close(self):
+        """
+        Close all pooled database connections
+        
+        The engine stays usable and reconnects on demand. The shared engine is
+        also disposed at interpreter exit (see Config.get_database_engine).
+        """
+        self.engine.dispose()
+    
+    def _changed_digest(self, source_file: str, table_name: str, force: bool = False):
+        """
+        Hash a source file and compare it with the one last loaded into a table
+        
+        Args:
+            source_file (str): Path to the input file
+            table_name (str): Table the file is loaded into
+            force (bool): Treat the file as changed regardless of its digest
+            
+        Returns:
+            str | None: The file's digest, or None if it is unchanged and can be skipped
+        """
+        digest = _file_digest(source_file)
+        if not force and self.db_loader.get_source_digest(table_name) == digest:
+            logging.info("Skipping %s: %s is unchanged since its last load", table_name, source_file)
+            return None
+        return digest
+    
+    def _stream_customers(self, customers_csv: str):
+        """
+        Clean and load customers concurrently through a bounded queue
+        
+        The next chunk is parsed and cleaned while a loader thread writes the
+        previous one, so only a few chunks are held in memory at a time.
+        
+        Args:
+            customers_csv (str): Path to customers CSV file
+        """
+        # Start a fresh lookup so an earlier run's chunks are not stamped onto orders again
+        self.db_loader.begin_customer_load()
+        chunks = queue.Queue(maxsize=LOAD_QUEUE_CHUNKS)
+        load_failed = threading.Event()
+        
+        def load_chunks():
+            try:
+                while (chunk := chunks.get()) is not None:
+                    self.db_loader.load_customers_chunk(chunk)
+            except Exception:
+                load_failed.set()
+                # Keep draining so the producer never blocks on a full queue
+                while chunks.get() is not None:
+                    pass
+                raise
+        
+        with ThreadPoolExecutor(max_workers=1) as loader_pool:
+            loader = loader_pool.submit(load_chunks)
+            try:
+                for chunk in self.customer_cleaner.iter_clean_customers(customers_csv):
+                    if load_failed.is_set():
+                        break
+                    chunks.put(chunk)
+            finally:
+                chunks.put(None)
+            loader.result()
     
     def launch_dashboard_only(self):
         """Launch only the dashboard without running ETL"""